@@ -0,0 +1,105 @@
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def resolver(
+    valores: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: int,
+    limite_superior: int,
+) -> np.ndarray:
+    """
+    DP 0-1 clássica em vetor único com varredura reversa de capacidade.
+    Recebe `valores` em ponto fixo (centavos, int64) e `pesos`/`capacidade`
+    já discretizados (inteiros) e retorna os índices relativos dos itens
+    selecionados, reconstruídos via tabela de
+    escolhas. O laço interno compila para código nativo (Numba), dispensando
+    os buffers duplos e as cópias de linha da versão NumPy.
+
+    A tabela de escolhas é empacotada bit a bit (um bit por capacidade),
+    reduzindo em 8x a memória do backtracking — para n itens e capacidade C
+    são n*(C+1)/8 bytes em vez de n*(C+1).
+
+    `limite_superior` (centavos) permite parada antecipada: se dp[C] alcança
+    o limite da relaxação linear, a solução já é ótima e os itens restantes
+    podem ser ignorados. Use 0 para desativar.
+    """
+    n = valores.shape[0]
+    dp = np.zeros(capacidade + 1, dtype=np.int64)
+    escolhas = np.zeros((n, (capacidade + 8) >> 3), dtype=np.uint8)
+
+    for i in range(n):
+        peso_i = pesos[i]
+        valor_i = valores[i]
+        # Varredura reversa permite atualizar `dp` in-place (0-1 clássico)
+        for c in range(capacidade, peso_i - 1, -1):
+            candidato = dp[c - peso_i] + valor_i
+            if candidato > dp[c]:
+                dp[c] = candidato
+                escolhas[i, c >> 3] |= np.uint8(1 << (c & 7))
+        if limite_superior > 0 and dp[capacidade] >= limite_superior:
+            break
+
+    # Reconstrói solução percorrendo de trás para frente
+    selecionados = np.empty(n, dtype=np.int64)
+    k = 0
+    restante = capacidade
+    for i in range(n - 1, -1, -1):
+        if (escolhas[i, restante >> 3] >> (restante & 7)) & 1:
+            selecionados[k] = i
+            k += 1
+            restante -= pesos[i]
+    return selecionados[:k]
+
+
+@njit(cache=True)
+def resolver_por_valor(
+    valores_escalados: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: float,
+) -> np.ndarray:
+    """
+    DP dual sobre o eixo de valores (FPTAS por escalonamento): dp[v] guarda
+    o menor peso capaz de atingir o valor escalonado v; a resposta é o maior
+    v com dp[v] <= capacidade. O custo depende da soma dos valores
+    escalonados, não da capacidade — útil quando a capacidade discretizada
+    é grande demais para `resolver`.
+
+    Mesma tabela de escolhas empacotada bit a bit da DP por capacidade,
+    agora indexada por valor.
+    """
+    n = valores_escalados.shape[0]
+    soma_valores = int(valores_escalados.sum())
+    dp = np.full(soma_valores + 1, np.inf)
+    dp[0] = 0.0
+    escolhas = np.zeros((n, (soma_valores + 8) >> 3), dtype=np.uint8)
+
+    for i in range(n):
+        valor_i = valores_escalados[i]
+        if valor_i <= 0:
+            continue
+        peso_i = pesos[i]
+        for v in range(soma_valores, valor_i - 1, -1):
+            candidato = dp[v - valor_i] + peso_i
+            if candidato < dp[v]:
+                dp[v] = candidato
+                escolhas[i, v >> 3] |= np.uint8(1 << (v & 7))
+
+    # Maior valor escalonado alcançável dentro da capacidade
+    melhor_v = 0
+    for v in range(soma_valores, -1, -1):
+        if dp[v] <= capacidade:
+            melhor_v = v
+            break
+
+    # Reconstrói solução percorrendo de trás para frente
+    selecionados = np.empty(n, dtype=np.int64)
+    k = 0
+    restante = melhor_v
+    for i in range(n - 1, -1, -1):
+        if (escolhas[i, restante >> 3] >> (restante & 7)) & 1:
+            selecionados[k] = i
+            k += 1
+            restante -= valores_escalados[i]
+    return selecionados[:k]
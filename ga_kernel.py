@@ -0,0 +1,190 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _inicializar(
+    valores: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: float,
+    ordem: np.ndarray,
+    sorteio_init: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Constrói a população inicial viável por construção: percorre os itens em
+    ordem de razão e inclui com probabilidade 0.3 enquanto couberem.
+    Retorna a matriz de indivíduos (uint8) e suas aptidões.
+    """
+    populacao, n = sorteio_init.shape
+    P = np.zeros((populacao, n), dtype=np.uint8)
+    apt = np.zeros(populacao, dtype=np.float64)
+    for i in prange(populacao):
+        peso_atual = 0.0
+        valor_atual = 0.0
+        for k in range(n):
+            j = ordem[k]
+            if sorteio_init[i, k] < 0.3 and peso_atual + pesos[j] <= capacidade:
+                P[i, j] = 1
+                peso_atual += pesos[j]
+                valor_atual += valores[j]
+        apt[i] = valor_atual
+    return P, apt
+
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _geracao(
+    valores: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: float,
+    taxa_cruzamento: float,
+    taxa_mutacao: float,
+    ordem: np.ndarray,
+    P: np.ndarray,
+    proxima: np.ndarray,
+    apt: np.ndarray,
+    candidatos: np.ndarray,
+    u_cruza: np.ndarray,
+    u_masc: np.ndarray,
+    u_mut: np.ndarray,
+) -> None:
+    """
+    Executa uma geração sobre sorteios recebidos prontos: seleção por
+    torneio (tamanho 3), crossover uniforme, mutação XOR e reparo de
+    viabilidade em `prange` sobre os pares. Escreve os filhos em `proxima`
+    e sobrescreve `apt` com as novas aptidões (valor total se viável, 0 se
+    inviável).
+    """
+    populacao, n = P.shape
+    pares = populacao // 2
+
+    # Seleção por torneio (tamanho 3) com reposição
+    vencedores = np.empty(populacao, dtype=np.int64)
+    for i in range(populacao):
+        v = candidatos[i, 0]
+        if apt[candidatos[i, 1]] > apt[v]:
+            v = candidatos[i, 1]
+        if apt[candidatos[i, 2]] > apt[v]:
+            v = candidatos[i, 2]
+        vencedores[i] = v
+
+    # Crossover uniforme + mutação XOR + reparo, por par de filhos
+    for p in prange(pares):
+        f1 = 2 * p
+        f2 = 2 * p + 1
+        a = vencedores[f1]
+        b = vencedores[f2]
+        if u_cruza[p] < taxa_cruzamento:
+            for j in range(n):
+                if u_masc[f1, j] < 0.5:
+                    proxima[f1, j] = P[a, j]
+                    proxima[f2, j] = P[b, j]
+                else:
+                    proxima[f1, j] = P[b, j]
+                    proxima[f2, j] = P[a, j]
+        else:
+            for j in range(n):
+                proxima[f1, j] = P[a, j]
+                proxima[f2, j] = P[b, j]
+
+        for f in (f1, f2):
+            # Mutação bit a bit
+            peso = 0.0
+            for j in range(n):
+                if u_mut[f, j] < taxa_mutacao:
+                    proxima[f, j] ^= 1
+                if proxima[f, j]:
+                    peso += pesos[j]
+            # Reparo: mantém itens em ordem de razão enquanto couberem
+            if peso > capacidade:
+                peso = 0.0
+                for k in range(n):
+                    j = ordem[k]
+                    if proxima[f, j]:
+                        if peso + pesos[j] <= capacidade:
+                            peso += pesos[j]
+                        else:
+                            proxima[f, j] = 0
+
+    # População ímpar: o último indivíduo passa direto da seleção
+    if populacao % 2 == 1:
+        for j in range(n):
+            proxima[populacao - 1, j] = P[vencedores[populacao - 1], j]
+
+    # Aptidão da nova geração, uma única avaliação por indivíduo
+    for i in prange(populacao):
+        peso = 0.0
+        valor = 0.0
+        for j in range(n):
+            if proxima[i, j]:
+                peso += pesos[j]
+                valor += valores[j]
+        apt[i] = valor if peso <= capacidade else 0.0
+
+
+def evoluir(
+    valores: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: float,
+    populacao: int,
+    geracoes: int,
+    taxa_cruzamento: float,
+    taxa_mutacao: float,
+    semente: int,
+) -> np.ndarray:
+    """
+    Laço evolutivo do Algoritmo Genético. Os sorteios de cada geração são
+    feitos aqui com `np.random.default_rng(semente)`, fora dos kernels
+    compilados — sob `parallel=True` os preenchimentos de array do
+    `np.random` usam estados de RNG por thread, o que tornaria o resultado
+    dependente do número de threads. As partes pesadas (inicialização,
+    crossover/mutação/reparo e aptidão) rodam nos kernels `prange` acima.
+    Retorna o melhor indivíduo observado (vetor de bits uint8).
+    """
+    rng = np.random.default_rng(semente)
+    n = valores.shape[0]
+
+    # Ordem por razão valor/peso, calculada uma única vez (inicialização
+    # e reparo de viabilidade seguem essa ordem)
+    ordem = np.argsort(-(valores / pesos))
+
+    P, apt = _inicializar(
+        valores, pesos, capacidade, ordem, rng.random((populacao, n))
+    )
+
+    idx_melhor = int(np.argmax(apt))
+    melhor = P[idx_melhor].copy()
+    melhor_apt = float(apt[idx_melhor])
+
+    proxima = np.empty_like(P)
+    pares = populacao // 2
+
+    for _ in range(geracoes):
+        _geracao(
+            valores,
+            pesos,
+            capacidade,
+            taxa_cruzamento,
+            taxa_mutacao,
+            ordem,
+            P,
+            proxima,
+            apt,
+            rng.integers(0, populacao, size=(populacao, 3)),
+            rng.random(pares),
+            rng.random((populacao, n)),
+            rng.random((populacao, n)),
+        )
+
+        # Elitismo: mantém o melhor observado e substitui o pior
+        idx_melhor = int(np.argmax(apt))
+        if apt[idx_melhor] > melhor_apt:
+            melhor_apt = float(apt[idx_melhor])
+            melhor[:] = proxima[idx_melhor]
+
+        idx_pior = int(np.argmin(apt))
+        proxima[idx_pior] = melhor
+        apt[idx_pior] = melhor_apt
+
+        P, proxima = proxima, P
+
+    return melhor
@@ -1,6 +1,6 @@
 import argparse
 import json
-import unicodedata
+import re
 from pathlib import Path
 
 import numpy as np
@@ -15,72 +15,91 @@ from config import (
 )
 
 
-def _normalizar(txt: str) -> str:
-    up = txt.upper()
-    return "".join(
-        ch
-        for ch in unicodedata.normalize("NFD", up)
-        if unicodedata.category(ch) != "Mn"
+# Palavras-chave por tipo consolidado, em ordem de prioridade ("^" marca
+# prefixo). As alternâncias são compiladas uma única vez na importação: cada
+# descrição é varrida uma vez por tipo, em vez de uma checagem `in` por
+# palavra-chave.
+_PADROES_TRIBUTO = [
+    (tipo, re.compile(padrao))
+    for tipo, padrao in [
+        ("ICMS", r"ICMS"),
+        ("ISS", r"^ISS|IMPOSTO SOBRE SERVI|SERVICO|ISSQN|ISS -"),
+        ("IPVA", r"^IPVA|VEICULO|AUTOMOT|MOTO|CARRO"),
+        ("IPTU", r"^IPTU|PREDIAL|TERRITORIAL|URBANO"),
+        ("ITCD", r"^ITCD|ITCMD|CAUSA MORTIS|DOACAO|HERANCA"),
+        ("ITBI", r"^ITBI|INTER VIVOS|TRANSMISSAO|IMOVEIS|IMOVEL|BENS IMOVEIS"),
+    ]
+]
+
+
+def _normalizar_serie(serie: pd.Series) -> pd.Series:
+    """Normaliza a coluna inteira de uma vez: maiúsculas e sem acentos."""
+    return (
+        serie.astype("string")
+        .fillna("")
+        .str.upper()
+        .str.normalize("NFD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
     )
 
 
-def _mapear_tipo_tributo(valor_str: str) -> str:
+def mapear_tipos_tributo(serie: pd.Series) -> pd.Series:
     """
-    Mapeia a descrição detalhada do imposto em `estatisticas-processos.csv`
-    para um tipo de tributo agregado compatível com o dataset principal.
-    Regras simples por prefixo/palavra-chave para
-    ICMS, ISS, IPVA, IPTU, ITCD, ITBI, OUTROS.
+    Mapeia descrições detalhadas de imposto para um tipo de tributo agregado
+    (ICMS, ISS, IPVA, IPTU, ITCD, ITBI, OUTROS). Classifica a coluna inteira
+    com np.select sobre predicados str.contains (uma passada em C por regra),
+    sem chamadas Python por linha.
     """
-    if not isinstance(valor_str, str):
-        return "OUTROS"
-    s = _normalizar(valor_str)
-
-    # Regras por palavra-chave (com e sem acento, já normalizado)
-    if s.startswith("ICMS") or "ICMS" in s:
-        return "ICMS"
-    if (
-        s.startswith("ISS")
-        or "IMPOSTO SOBRE SERVI" in s
-        or "SERVICO" in s
-        or "ISSQN" in s
-        or "ISS -" in s
-    ):
-        return "ISS"
-    if (
-        s.startswith("IPVA")
-        or "VEICULO" in s
-        or "AUTOMOT" in s
-        or "MOTO" in s
-        or "CARRO" in s
-    ):
-        return "IPVA"
-    if (
-        s.startswith("IPTU")
-        or "PREDIAL" in s
-        or "TERRITORIAL" in s
-        or "URBANO" in s
-        or "IMPOSTO PREDIAL" in s
-        or "IMPOSTO TERRITORIAL" in s
-    ):
-        return "IPTU"
-    if (
-        s.startswith("ITCD")
-        or "ITCMD" in s
-        or "CAUSA MORTIS" in s
-        or "DOACAO" in s
-        or "HERANCA" in s
-    ):
-        return "ITCD"
-    if (
-        s.startswith("ITBI")
-        or "INTER VIVOS" in s
-        or "TRANSMISSAO" in s
-        or "IMOVEIS" in s
-        or "IMOVEL" in s
-        or "BENS IMOVEIS" in s
-    ):
-        return "ITBI"
-    return "OUTROS"
+    s = _normalizar_serie(serie)
+    condicoes = [
+        s.str.contains(padrao).fillna(False) for _, padrao in _PADROES_TRIBUTO
+    ]
+    tipos = np.select(
+        condicoes, [tipo for tipo, _ in _PADROES_TRIBUTO], default="OUTROS"
+    )
+    return pd.Series(tipos, index=serie.index)
+
+
+# Esquema explícito do CSV bruto: evita a inferência de dtypes do pandas
+# (mais lenta e com pico de memória maior) e fixa os tipos numéricos
+DTYPES_SITAF = {
+    "numero_divida_ativa": "int64",
+    "valor_total_corrigido": "float64",
+    "valor_original": "float64",
+    "codigo_receita": "int64",
+    "codigo_situacao_cda": "int32",
+    "ano_base": "int16",
+}
+
+# Colunas de baixa cardinalidade convertidas para category após a leitura
+COLUNAS_CATEGORICAS = ["tipo_receita", "descricao_receita"]
+
+# Tamanho dos blocos da leitura em streaming
+LINHAS_POR_BLOCO = 250_000
+
+
+def _ler_csv_entrada(caminho_csv: Path) -> pd.DataFrame:
+    """
+    Lê o CSV bruto (separador ';', decimal ',') em blocos com esquema de
+    dtypes explícito e consolida num único DataFrame. As colunas de texto de
+    baixa cardinalidade viram category só no fim — o concat de blocos com
+    categorias divergentes rebaixaria o dtype.
+    """
+    colunas = pd.read_csv(caminho_csv, sep=";", nrows=0).columns
+    dtypes = {c: t for c, t in DTYPES_SITAF.items() if c in colunas}
+    blocos = pd.read_csv(
+        caminho_csv,
+        sep=";",
+        decimal=",",
+        dtype=dtypes,
+        chunksize=LINHAS_POR_BLOCO,
+    )
+    df = pd.concat(blocos, ignore_index=True)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    return df
 
 
 def carregar_fatores_por_tributo(
@@ -94,7 +113,7 @@ def carregar_fatores_por_tributo(
     """
     df_est = pd.read_csv(caminho_estatisticas)
     # Coluna de tipo de tributo consolidado
-    df_est["tipo_tributo"] = df_est["DETIPOIMPOSTO"].map(_mapear_tipo_tributo)
+    df_est["tipo_tributo"] = mapear_tipos_tributo(df_est["DETIPOIMPOSTO"])
 
     # Converte `media_prazo` (em dias corridos) para horas úteis
     # Aproximação: proporção de dias úteis no ano multiplicada por 8h/dia
@@ -104,21 +123,30 @@ def carregar_fatores_por_tributo(
         * fator_dias_para_horas
     )
 
-    # Mediana do prazo (em horas úteis) por tributo
-    med_por_tipo = (
-        df_est.groupby("tipo_tributo")["media_prazo_horas_uteis"].median().dropna()
-    )
-    if med_por_tipo.empty:
+    # Mediana do prazo (em horas úteis) por tributo, sem groupby: fatora os
+    # tipos, ordena uma única vez por código e tira np.median por fatia —
+    # evita a materialização de grupos do groupby.median para cardinalidade
+    # tão baixa (7 tipos)
+    codigos, tipos_unicos = pd.factorize(df_est["tipo_tributo"])
+    ordem = np.argsort(codigos, kind="stable")
+    prazos_ord = df_est["media_prazo_horas_uteis"].to_numpy()[ordem]
+    codigos_ord = codigos[ordem]
+    cortes = np.searchsorted(codigos_ord, np.arange(len(tipos_unicos) + 1))
+
+    horas_por_tipo: dict = {}
+    for k, tipo in enumerate(tipos_unicos):
+        fatia = prazos_ord[cortes[k]:cortes[k + 1]]
+        fatia = fatia[~np.isnan(fatia)]
+        if len(fatia):
+            horas_por_tipo[tipo] = float(np.median(fatia))
+    if not horas_por_tipo:
         raise ValueError(
             "Não foi possível calcular a mediana do prazo por tipo de tributo"
         )
 
-    med_global = med_por_tipo.median()
+    med_global = float(np.median(list(horas_por_tipo.values())))
     if med_global <= 0 or np.isnan(med_global):
         raise ValueError("Não foi possível calcular a mediana global do prazo")
-
-    # Usa horas medianas absolutas por tipo (em horas úteis)
-    horas_por_tipo = med_por_tipo.to_dict()
     # Garante presença das chaves esperadas (fallback: mediana global)
     for k in ["ICMS", "ISS", "IPVA", "IPTU", "ITCD", "ITBI", "OUTROS"]:
         horas_por_tipo.setdefault(k, float(med_global))
@@ -139,20 +167,26 @@ def calcular_pesos(df: pd.DataFrame) -> pd.Series:
 
     # Mapeia as categorias do dataset principal para tipos consolidados
     if "descricao_receita" in df.columns:
-        tipos_consolidados = df["descricao_receita"].apply(_mapear_tipo_tributo)
+        tipos_consolidados = mapear_tipos_tributo(df["descricao_receita"])
     elif "tipo_receita" in df.columns:
-        tipos_consolidados = df["tipo_receita"].apply(_mapear_tipo_tributo)
+        tipos_consolidados = mapear_tipos_tributo(df["tipo_receita"])
     else:
         tipos_consolidados = pd.Series(["OUTROS"] * len(df), index=df.index)
 
-    # Horas por registro: horas medianas do tipo; fallback: mediana global
-    peso_horas = (
-        tipos_consolidados.map(horas_por_tributo)
-        .fillna(float(mediana_global_horas))
-        .astype(float)
+    # Horas por registro: horas medianas do tipo; fallback: mediana global.
+    # O lookup consulta o dicionário uma vez por categoria (7 tipos) e vira
+    # um gather indexado pelos códigos, em vez de um hash lookup por linha
+    tipos_cat = pd.Categorical(tipos_consolidados)
+    fatores = np.array(
+        [
+            horas_por_tributo.get(categoria, float(mediana_global_horas))
+            for categoria in tipos_cat.categories
+        ],
+        dtype=np.float64,
     )
-    peso_horas = peso_horas.clip(lower=0.25)
-    return peso_horas
+    peso_horas = fatores[tipos_cat.codes]
+    np.maximum(peso_horas, 0.25, out=peso_horas)
+    return pd.Series(peso_horas, index=df.index)
 
 
 def preprocessar_dados(caminho_csv: Path, prefixo_saida: Path) -> dict:
@@ -161,7 +195,7 @@ def preprocessar_dados(caminho_csv: Path, prefixo_saida: Path) -> dict:
     prontos para os algoritmos (CSV filtrado + NPZ com vetores numéricos).
     """
     # Lê o CSV bruto com separador ";" e decimal "," (formatação PT-BR)
-    df = pd.read_csv(caminho_csv, sep=";", decimal=",")
+    df = _ler_csv_entrada(caminho_csv)
 
     # Valida presença das colunas mínimas necessárias
     if "valor_total_corrigido" not in df.columns:
@@ -175,8 +209,11 @@ def preprocessar_dados(caminho_csv: Path, prefixo_saida: Path) -> dict:
             errors="coerce",
         )
 
-    # Benefício (valor monetário) e custo (peso em horas)
-    df["valor"] = df["valor_total_corrigido"].astype(float).clip(lower=0.0)
+    # Benefício (valor monetário) e custo (peso em horas). O clip vira um
+    # np.maximum in-place sobre o buffer recém-copiado: uma passada a menos
+    # e nenhum intermediário extra em relação a astype(...).clip(...)
+    valor = df["valor_total_corrigido"].to_numpy(dtype=np.float64, copy=True)
+    df["valor"] = np.maximum(valor, 0.0, out=valor)
     df["peso_horas"] = calcular_pesos(df)
 
     # Remove linhas inválidas (valor/peso não positivos) e recompõe índices
@@ -186,14 +223,22 @@ def preprocessar_dados(caminho_csv: Path, prefixo_saida: Path) -> dict:
     vetor_valores = df_alg["valor"].to_numpy(dtype=float)
     vetor_pesos = df_alg["peso_horas"].to_numpy(dtype=float)
 
-    # Persistência: CSV filtrado, NPZ compacto com arrays e índices
+    # Persistência: CSV filtrado, Parquet (leitura rápida pelos runners) e
+    # NPZ compacto com arrays e índices
     prefixo_saida.parent.mkdir(parents=True, exist_ok=True)
     df_alg.to_csv(f"{prefixo_saida}.csv", index=False)
-    np.savez_compressed(
+    df_alg.to_parquet(f"{prefixo_saida}.parquet", index=False)
+    # Sem compressão: os vetores são float64 de alta entropia (valores
+    # monetários), o deflate custava CPU para razão de compressão pobre e o
+    # consumidor lê tudo para a RAM de qualquer forma
+    np.savez(
         f"{prefixo_saida}.npz",
         valores=vetor_valores,
+        # Representação em ponto fixo (centavos) para consumidores que exigem
+        # aritmética inteira exata (ex.: kernel da DP)
+        valores_cent=np.round(vetor_valores * 100.0).astype(np.int64),
         pesos=vetor_pesos,
-        index=df_alg.index.values,
+        index=df_alg.index.values.astype(np.int32),
     )
 
     # Metadados para rastreabilidade e auditoria
@@ -201,6 +246,7 @@ def preprocessar_dados(caminho_csv: Path, prefixo_saida: Path) -> dict:
         "linhas_entrada": int(len(df)),
         "linhas_saida": int(len(df_alg)),
         "csv_saida": f"{prefixo_saida}.csv",
+        "parquet_saida": f"{prefixo_saida}.parquet",
         "npz_saida": f"{prefixo_saida}.npz",
         "colunas": list(df_alg.columns),
     }
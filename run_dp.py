@@ -4,7 +4,6 @@ import time
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
 
 from config import (
     CAPACIDADE_PADRAO,
@@ -12,18 +11,49 @@ from config import (
     OUTPUT_PREFIXO_DP,
     RESOLUCAO_PADRAO,
 )
-from utils import build_summary, load_data, save_data
+from dp_kernel import resolver, resolver_por_valor
+from utils import build_summary, carregar_selecao, load_data, save_data
+
+
+def limite_superior_lp(
+    valores: np.ndarray, pesos: np.ndarray, capacidade: float
+) -> float:
+    """
+    Limite superior de Dantzig (relaxação linear da mochila): soma itens em
+    ordem de razão valor/peso e completa com a fração do primeiro que não
+    cabe. Como a discretização por ceil só aperta a restrição, o limite
+    contínuo também vale para a DP discretizada.
+    """
+    ordem = np.argsort(-(valores / pesos))
+    pesos_acum = np.cumsum(pesos[ordem])
+    k = int(np.searchsorted(pesos_acum, capacidade, side="right"))
+    limite = float(valores[ordem[:k]].sum())
+    if k < len(ordem):
+        restante = capacidade - (float(pesos_acum[k - 1]) if k else 0.0)
+        limite += float(valores[ordem[k]]) * restante / float(pesos[ordem[k]])
+    return limite
 
 
 def mochila_dp(
-    valores: np.ndarray, pesos: np.ndarray, capacidade: float, resolucao: float
+    valores: np.ndarray,
+    pesos: np.ndarray,
+    capacidade: float,
+    resolucao: float,
+    valores_cent: np.ndarray | None = None,
 ) -> list[int]:
     """
-    Programação Dinâmica 0-1 com otimização de espaço.
+    Programação Dinâmica 0-1 com discretização de horas.
+    O laço interno roda em kernel compilado (ver `dp_kernel.resolver`).
+    `valores_cent` é a representação em ponto fixo (centavos) dos valores,
+    gravada no NPZ pelo pré-processamento; se omitida, é recalculada.
     Retorna índices relativos dos itens selecionados.
     """
     if capacidade <= 0 or resolucao <= 0:
         return []
+    # Valores em ponto fixo (centavos): acumulação inteira exata no kernel,
+    # sem erros de arredondamento ao somar montantes em BRL.
+    if valores_cent is None:
+        valores_cent = np.round(valores * 100.0).astype(np.int64)
     # Filtra itens que cabem na mochila
     itens_validos = pesos <= capacidade
     if not itens_validos.any():
@@ -31,47 +61,58 @@ def mochila_dp(
 
     valores_filtrados = valores[itens_validos]
     pesos_filtrados = pesos[itens_validos]
+    valores_cent_filtrados = valores_cent[itens_validos]
     indices_originais = np.where(itens_validos)[0]
 
     # Discretização: usa ceil para garantir que peso discreto não subestime o
     # contínuo e floor na capacidade para não permitir ultrapassar.
-    pesos_discretos = (np.ceil(pesos_filtrados / resolucao)).astype(int)
+    pesos_discretos = (np.ceil(pesos_filtrados / resolucao)).astype(np.int64)
     capacidade_discreta = int(np.floor(capacidade / resolucao))
-    n = len(valores_filtrados)
 
-    # Otimização: usa apenas duas linhas da tabela
-    anterior = np.zeros(capacidade_discreta + 1, dtype=float)
-    atual = np.zeros(capacidade_discreta + 1, dtype=float)
-    escolhas = np.zeros((n, capacidade_discreta + 1), dtype=bool)
-
-    for i in range(n):
-        peso_i = pesos_discretos[i]
-        valor_i = valores_filtrados[i]
+    # Limite superior da relaxação linear (em centavos, ceil para manter a
+    # garantia de cota superior) habilita a parada antecipada no kernel
+    limite_cent = int(
+        np.ceil(limite_superior_lp(valores_filtrados, pesos_filtrados, capacidade) * 100.0)
+    )
 
-        # Copia linha anterior (transição 0/1 com otimização de duas linhas)
-        atual[:] = anterior
+    idx_rel = resolver(
+        valores_cent_filtrados, pesos_discretos, capacidade_discreta, limite_cent
+    )
+    return indices_originais[idx_rel].tolist()
 
-        if peso_i <= capacidade_discreta:
-            # Calcula candidato: incluir item i versus não incluir
-            for j in range(peso_i, capacidade_discreta + 1):
-                candidato = anterior[j - peso_i] + valor_i
-                if candidato > atual[j]:
-                    atual[j] = candidato
-                    escolhas[i, j] = True
 
-        # Troca as linhas
-        anterior, atual = atual, anterior
+def mochila_dp_valor(
+    valores: np.ndarray, pesos: np.ndarray, capacidade: float, eps: float
+) -> list[int]:
+    """
+    FPTAS por escalonamento de valores: divide os valores por
+    K = eps * max(valores) / n e resolve a DP dual sobre o eixo de valores
+    (ver `dp_kernel.resolver_por_valor`). Garante pelo menos (1 - eps) do
+    ótimo com custo O(n² / eps), independente da capacidade — indicado
+    quando a capacidade discretizada explode; combine com --top-k para
+    limitar n.
+    """
+    if capacidade <= 0 or eps <= 0:
+        return []
+    itens_validos = pesos <= capacidade
+    if not itens_validos.any():
+        return []
 
-    # Reconstrói solução percorrendo de trás para frente
-    selecionados = []
-    restante = capacidade_discreta
+    valores_filtrados = valores[itens_validos]
+    pesos_filtrados = pesos[itens_validos]
+    indices_originais = np.where(itens_validos)[0]
 
-    for i in range(n - 1, -1, -1):
-        if escolhas[i, restante]:
-            selecionados.append(indices_originais[i])
-            restante -= pesos_discretos[i]
+    fator_escala = eps * float(valores_filtrados.max()) / len(valores_filtrados)
+    valores_escalados = np.floor(valores_filtrados / fator_escala).astype(
+        np.int64
+    )
 
-    return selecionados
+    idx_rel = resolver_por_valor(
+        valores_escalados,
+        pesos_filtrados.astype(np.float64),
+        float(capacidade),
+    )
+    return indices_originais[idx_rel].tolist()
 
 
 def filtrar_itens(
@@ -85,7 +126,12 @@ def filtrar_itens(
     if modo == "value":
         ordem = np.argsort(-valores)
     elif modo == "ratio":
-        ordem = np.argsort(-(valores / pesos))
+        # Chave em float32 via recíproco pré-calculado: só a ordem relativa
+        # importa para o corte, e a ordenação corre com metade da banda de
+        # memória; o kind estável fixa o desempate de chaves iguais
+        inv_pesos = (1.0 / pesos).astype(np.float32)
+        chave = -(valores.astype(np.float32) * inv_pesos)
+        ordem = np.argsort(chave, kind="stable")
     else:
         return valores, pesos, idx_orig
     escolher = ordem[:top_k]
@@ -97,10 +143,28 @@ def executar() -> None:
     parser.add_argument("--npz", type=Path, default=INPUT_PREPROCESSADO)
     parser.add_argument("--capacidade", type=float, default=CAPACIDADE_PADRAO)
     parser.add_argument("--resolucao", type=float, default=RESOLUCAO_PADRAO)
+    parser.add_argument(
+        "--algoritmo",
+        choices=["capacity", "value-scaling"],
+        default="capacity",
+        help="DP por capacidade (exata na grade) ou FPTAS por valores",
+    )
+    parser.add_argument(
+        "--eps",
+        type=float,
+        default=0.1,
+        help="Tolerância do FPTAS (apenas para --algoritmo value-scaling)",
+    )
     parser.add_argument("--top-k", type=int, default=0)
     parser.add_argument(
         "--modo-filtro", choices=["none", "value", "ratio"], default="ratio"
     )
+    parser.add_argument(
+        "--formato",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Formato da seleção exportada",
+    )
     parser.add_argument(
         "--prefixo-saida",
         type=Path,
@@ -109,36 +173,52 @@ def executar() -> None:
     args = parser.parse_args()
 
     t0 = time.perf_counter()
-    valores, pesos, idx_map, caminho_csv = load_data(args.npz)
+    valores, valores_cent, pesos, idx_map, caminho_tabela = load_data(args.npz)
     valores_f, pesos_f, idx_f = filtrar_itens(
         valores,
         pesos,
         args.top_k if args.top_k > 0 else None,
         args.modo_filtro,
     )
-    idx_rel = mochila_dp(valores_f, pesos_f, args.capacidade, args.resolucao)
+    if args.algoritmo == "value-scaling":
+        idx_rel = mochila_dp_valor(
+            valores_f, pesos_f, args.capacidade, args.eps
+        )
+    else:
+        idx_rel = mochila_dp(
+            valores_f,
+            pesos_f,
+            args.capacidade,
+            args.resolucao,
+            valores_cent=valores_cent[idx_f],
+        )
     idx_abs = idx_f[idx_rel]
 
-    df = pd.read_csv(caminho_csv)
-    df_sel = df.iloc[idx_abs].copy()
+    df_sel = carregar_selecao(caminho_tabela, idx_abs)
+    hours_total = float(pesos[idx_abs].sum())
+    value_total = float(valores[idx_abs].sum())
 
     elapsed = time.perf_counter() - t0
 
     resumo = build_summary(
         algorithm="dp",
-        inputs={"npz": args.npz, "csv": caminho_csv},
+        inputs={"npz": args.npz, "tabela": caminho_tabela},
         params={
             "capacity": float(args.capacidade),
             "resolution": float(args.resolucao),
+            "variant": args.algoritmo,
+            "eps": float(args.eps),
             "top_k": int(args.top_k),
             "filter_mode": args.modo_filtro,
         },
-        df_candidates=df,
-        df_selected=df_sel,
+        n_candidates=len(valores),
+        n_selected=len(idx_abs),
+        hours_total=hours_total,
+        value_total=value_total,
         elapsed_seconds=elapsed,
     )
 
-    save_data(args.prefixo_saida, df_sel, resumo)
+    save_data(args.prefixo_saida, df_sel, resumo, formato=args.formato)
     print(json.dumps(resumo, ensure_ascii=False, indent=2))
 
 
@@ -4,14 +4,39 @@ import time
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
 
 from config import (
     CAPACIDADE_PADRAO,
     INPUT_PREPROCESSADO,
     OUTPUT_PREFIXO_GULOSO,
 )
-from utils import build_summary, load_data, save_data
+from utils import build_summary, carregar_selecao, load_data, save_data
+
+
+def _percorrer(
+    ordem: np.ndarray, pesos: np.ndarray, capacidade: float
+) -> tuple[list[int], float]:
+    """
+    Percorre `ordem` incluindo cada item que ainda cabe. O prefixo que cabe
+    inteiro é resolvido de forma vetorizada (cumsum + searchsorted); o laço
+    por item percorre apenas a cauda que ainda pode caber individualmente,
+    preservando a semântica original de pular um item grande e continuar
+    nos seguintes. Retorna os escolhidos e a capacidade restante.
+    """
+    pesos_acum = np.cumsum(pesos[ordem])
+    k = int(np.searchsorted(pesos_acum, capacidade, side="right"))
+    escolhidos = ordem[:k].tolist()
+    restante = capacidade - (float(pesos_acum[k - 1]) if k else 0.0)
+
+    # Cauda: só itens que cabem no espaço restante inicial são candidatos
+    # (o espaço livre apenas diminui dali em diante)
+    cauda = ordem[k:]
+    cauda = cauda[pesos[cauda] <= restante]
+    for i in cauda:
+        if pesos[i] <= restante:
+            escolhidos.append(int(i))
+            restante -= pesos[i]
+    return escolhidos, restante
 
 
 def mochila_gulosa(
@@ -19,25 +44,43 @@ def mochila_gulosa(
 ) -> list[int]:
     """
     Seleciona itens pela maior razão valor/peso até atingir a capacidade.
-    Estratégia: ordena por eficiência (valor por hora) e inclui
-    enquanto couber.
+    Quando a capacidade comporta só uma fração dos itens, ordena apenas os
+    top-K por razão (argpartition O(n) + sort O(K log K)) em vez do argsort
+    completo; se após percorrer os K ainda couber algum item de fora, dobra
+    K e repete, de modo que o resultado é idêntico ao da ordenação completa.
     """
-    if capacidade <= 0:
+    n = len(valores)
+    if capacidade <= 0 or n == 0:
         return []
-    ordem = np.argsort(-(valores / pesos))
-    peso_total = 0.0
-    escolhidos = []
-    for i in ordem:
-        if peso_total + pesos[i] <= capacidade:
-            escolhidos.append(i)
-            peso_total += pesos[i]
-    return escolhidos
+    razao = valores / pesos
+    # Estimativa de quantos itens cabem, com folga para os pulos da cauda
+    k = int(1.5 * capacidade / float(pesos.mean())) + 1
+    while True:
+        if k >= n:
+            ordem = np.argsort(-razao)
+            escolhidos, _ = _percorrer(ordem, pesos, capacidade)
+            return escolhidos
+        cand = np.argpartition(-razao, k - 1)[:k]
+        ordem = cand[np.argsort(-razao[cand])]
+        escolhidos, restante = _percorrer(ordem, pesos, capacidade)
+        # Exato sse nenhum item fora do top-K caberia no espaço restante
+        fora = np.ones(n, dtype=bool)
+        fora[cand] = False
+        if float(pesos[fora].min()) > restante:
+            return escolhidos
+        k *= 2
 
 
 def executar() -> None:
     parser = argparse.ArgumentParser(description="Executar Mochila Gulosa")
     parser.add_argument("--npz", type=Path, default=INPUT_PREPROCESSADO)
     parser.add_argument("--capacidade", type=float, default=CAPACIDADE_PADRAO)
+    parser.add_argument(
+        "--formato",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Formato da seleção exportada",
+    )
     parser.add_argument(
         "--prefixo-saida",
         type=Path,
@@ -46,25 +89,28 @@ def executar() -> None:
     args = parser.parse_args()
 
     t0 = time.perf_counter()
-    valores, pesos, _, caminho_csv = load_data(args.npz)
+    valores, _, pesos, _, caminho_tabela = load_data(args.npz)
     idx_rel = mochila_gulosa(valores, pesos, args.capacidade)
-    idx_abs = np.arange(len(valores))[idx_rel]
+    idx_abs = np.asarray(idx_rel, dtype=np.int64)
 
-    df = pd.read_csv(caminho_csv)
-    df_sel = df.iloc[idx_abs].copy()
+    df_sel = carregar_selecao(caminho_tabela, idx_abs)
+    hours_total = float(pesos[idx_abs].sum())
+    value_total = float(valores[idx_abs].sum())
 
     elapsed = time.perf_counter() - t0
 
     resumo = build_summary(
         algorithm="guloso",
-        inputs={"npz": args.npz, "csv": caminho_csv},
+        inputs={"npz": args.npz, "tabela": caminho_tabela},
         params={"capacity": float(args.capacidade)},
-        df_candidates=df,
-        df_selected=df_sel,
+        n_candidates=len(valores),
+        n_selected=len(idx_abs),
+        hours_total=hours_total,
+        value_total=value_total,
         elapsed_seconds=elapsed,
     )
 
-    save_data(args.prefixo_saida, df_sel, resumo)
+    save_data(args.prefixo_saida, df_sel, resumo, formato=args.formato)
     print(json.dumps(resumo, ensure_ascii=False, indent=2))
 
 
@@ -1,3 +1,5 @@
+import datetime
+import functools
 import json
 import os
 import sys
@@ -6,41 +8,91 @@ from typing import Any, Dict, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 
 from config import DIAS_UTEIS, HORAS_DIA
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def load_data(
     caminho_npz: Path,
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Path]:
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Path]:
     """
-    Carrega vetores de valores e pesos do .npz e retorna também o caminho do
-    CSV filtrado correspondente (mesmo prefixo, extensão .csv).
+    Carrega do .npz os vetores de valores (float e ponto fixo em centavos)
+    e pesos, e retorna também o caminho da tabela filtrada correspondente
+    (mesmo prefixo): Parquet quando disponível, senão o CSV.
     """
     npz = np.load(caminho_npz)
-    valores = npz["valores"].astype(float)
-    pesos = npz["pesos"].astype(float)
+    # copy=False: o NPZ já grava float64, o astype vira no-op em vez de
+    # duplicar dois vetores de n elementos a cada execução
+    valores = npz["valores"].astype(np.float64, copy=False)
+    pesos = npz["pesos"].astype(np.float64, copy=False)
+    # Artefatos antigos podem não trazer a representação em centavos
+    if "valores_cent" in npz:
+        valores_cent = npz["valores_cent"].astype(np.int64, copy=False)
+    else:
+        valores_cent = np.round(valores * 100.0).astype(np.int64)
     indices = npz["index"]
+    caminho_parquet = Path(caminho_npz).with_suffix(".parquet")
+    if caminho_parquet.exists():
+        return valores, valores_cent, pesos, indices, caminho_parquet
     caminho_csv = Path(str(caminho_npz).replace(".npz", ".csv"))
-    return valores, pesos, indices, caminho_csv
+    return valores, valores_cent, pesos, indices, caminho_csv
+
+
+def carregar_tabela(caminho: Path) -> pd.DataFrame:
+    """Lê a tabela filtrada do pré-processamento (Parquet ou CSV)."""
+    if caminho.suffix == ".parquet":
+        return pd.read_parquet(caminho)
+    return pd.read_csv(caminho)
+
+
+def carregar_selecao(caminho: Path, indices: np.ndarray) -> pd.DataFrame:
+    """
+    Materializa apenas as linhas selecionadas da tabela filtrada: no caminho
+    Parquet faz o take das posições ainda em Arrow e converte só o recorte
+    para pandas; no CSV (artefatos antigos) lê tudo e fatia.
+    """
+    if caminho.suffix == ".parquet":
+        tabela = pq.read_table(caminho)
+        return tabela.take(np.asarray(indices)).to_pandas()
+    return carregar_tabela(caminho).iloc[indices].copy()
 
 
 def save_data(
     prefixo_saida: Path,
     df_sel: pd.DataFrame,
     resumo: dict,
+    formato: str = "csv",
 ) -> None:
     """
-    Salva a seleção em CSV e um resumo em JSON usando o prefixo informado.
+    Salva a seleção (CSV por padrão; Parquet com formato="parquet", com
+    escrita colunar bem mais rápida e dtypes preservados) e um resumo em
+    JSON usando o prefixo informado.
     """
     prefixo_saida.parent.mkdir(parents=True, exist_ok=True)
-    df_sel.to_csv(f"{prefixo_saida}.csv", index=False)
-    with open(f"{prefixo_saida}.json", "w", encoding="utf-8") as f:
-        json.dump(resumo, f, ensure_ascii=False, indent=2)
-
-
+    if formato == "parquet":
+        df_sel.to_parquet(f"{prefixo_saida}.parquet", index=False)
+    else:
+        df_sel.to_csv(f"{prefixo_saida}.csv", index=False)
+    # orjson (opcional) serializa direto em bytes, bem mais rápido que a
+    # stdlib em lotes de execuções; o esquema do JSON é o mesmo
+    if orjson is not None:
+        Path(f"{prefixo_saida}.json").write_bytes(
+            orjson.dumps(resumo, option=orjson.OPT_INDENT_2)
+        )
+    else:
+        with open(f"{prefixo_saida}.json", "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+
+@functools.lru_cache(maxsize=1)
 def system_metrics() -> Dict[str, Any]:
-    """Retorna métricas simples do ambiente de execução."""
+    """Retorna métricas simples do ambiente (estáticas; calculadas uma vez)."""
     metrics: Dict[str, Any] = {
         "python": sys.version.split()[0],
         "cpu_count": os.cpu_count(),
@@ -63,16 +115,21 @@ def build_summary(
     algorithm: str,
     inputs: Dict[str, Any],
     params: Dict[str, Any],
-    df_candidates: pd.DataFrame,
-    df_selected: pd.DataFrame,
+    n_candidates: int,
+    n_selected: int,
+    hours_total: float,
+    value_total: float,
     elapsed_seconds: float,
 ) -> Dict[str, Any]:
-    """Monta um resumo padronizado para as saídas dos runners."""
-    n_candidates = int(len(df_candidates))
-    n_selected = int(len(df_selected))
-
-    hours_total = float(df_selected["peso_horas"].sum()) if n_selected else 0.0
-    value_total = float(df_selected["valor"].sum()) if n_selected else 0.0
+    """
+    Monta um resumo padronizado para as saídas dos runners.
+    Recebe contagens e totais já calculados (os runners os obtêm por
+    reduções NumPy sobre os vetores do NPZ), sem materializar DataFrames.
+    """
+    n_candidates = int(n_candidates)
+    n_selected = int(n_selected)
+    hours_total = float(hours_total) if n_selected else 0.0
+    value_total = float(value_total) if n_selected else 0.0
 
     # Conversões de esforço
     days_business_total = hours_total / float(HORAS_DIA) if hours_total else 0.0
@@ -91,7 +148,7 @@ def build_summary(
 
     return {
         "algorithm": algorithm,
-        "timestamp": pd.Timestamp.utcnow().isoformat(),
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
         "params": params,
         "counts": {
             "n_candidates": n_candidates,